@@ -1,7 +1,12 @@
+import asyncio
 import logging
 import json
+import re
+import functools
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -17,6 +22,7 @@ from livekit.agents import (
     tokenize,
     function_tool,
 )
+from livekit.agents.tokenize import BufferedSentenceStream, SentenceStream
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
@@ -24,71 +30,171 @@ logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
+FRAUD_CASES_PATH = Path(__file__).parent.parent / "shared-data" / "fraud_cases.json"
 
-class RazorpaySDR(Agent):
+# How long confirm_transaction waits before writing, so retried confirmations coalesce into one write
+_FLUSH_DELAY = 0.05
+
+# Clause boundaries: punctuation followed by whitespace (so "1,299" or "3.5" stay whole),
+# or an em dash anywhere.
+_CLAUSE_BOUNDARY = re.compile(r"[,;:.!?]+(?=\s|$)\s*|—\s*")
+
+
+def _split_clauses(text: str, min_clause_len: int) -> list:
+    """Split text into (clause, start, end) tuples, merging clauses shorter than min_clause_len."""
+    clauses = []
+    start = 0
+    for match in _CLAUSE_BOUNDARY.finditer(text):
+        clause = text[start:match.end()].strip()
+        if len(clause) >= min_clause_len:
+            clauses.append((clause, start, match.end()))
+            start = match.end()
+
+    tail = text[start:].strip()
+    if tail:
+        clauses.append((tail, start, len(text)))
+    return clauses
+
+
+class ClauseTokenizer(tokenize.SentenceTokenizer):
+    """Flushes text to TTS on clause boundaries (commas, dashes, etc.) instead of full sentences,
+    so Murf can start synthesizing while the LLM is still generating the rest of the sentence."""
+
+    def __init__(self, *, min_clause_len: int = 15, stream_context_len: int = 10) -> None:
+        self._min_clause_len = min_clause_len
+        self._stream_context_len = stream_context_len
+
+    def tokenize(self, text: str, *, language: Optional[str] = None) -> list:
+        return [clause for clause, _, _ in _split_clauses(text, self._min_clause_len)]
+
+    # Inside this class body `tokenize` is the method above, not the module, so the
+    # stream types are imported by name
+    def stream(self, *, language: Optional[str] = None) -> SentenceStream:
+        return BufferedSentenceStream(
+            tokenizer=functools.partial(_split_clauses, min_clause_len=self._min_clause_len),
+            min_token_len=self._min_clause_len,
+            min_ctx_len=self._stream_context_len,
+        )
+
+
+@dataclass
+class FraudCase:
+    """A suspicious-transaction case from fraud_cases.json."""
+
+    __slots__ = (
+        "cardEnding",
+        "id",
+        "location",
+        "outcome",
+        "outcomeNote",
+        "securityAnswer",
+        "securityIdentifier",
+        "securityQuestion",
+        "status",
+        "transactionAmount",
+        "transactionCategory",
+        "transactionName",
+        "transactionSource",
+        "transactionTime",
+        "userName",
+    )
+
+    # Field names mirror the camelCase keys in fraud_cases.json
+    id: str
+    userName: str  # noqa: N815
+    securityIdentifier: str  # noqa: N815
+    cardEnding: str  # noqa: N815
+    transactionAmount: str  # noqa: N815
+    transactionName: str  # noqa: N815
+    transactionTime: str  # noqa: N815
+    transactionCategory: str  # noqa: N815
+    transactionSource: str  # noqa: N815
+    location: str
+    securityQuestion: str  # noqa: N815
+    securityAnswer: str  # noqa: N815
+    status: str
+    outcome: Optional[str]
+    outcomeNote: Optional[str]  # noqa: N815
+
+    @classmethod
+    def from_dict(cls, row: dict) -> "FraudCase":
+        # Cases that haven't been reviewed yet may not carry a status/outcome,
+        # and keys we don't model are ignored rather than rejected
+        fields = {"status": "pending_review", "outcome": None, "outcomeNote": None}
+        fields.update((key, value) for key, value in row.items() if key in cls.__slots__)
+        return cls(**fields)
+
+
+GREETING = "Hello, this is SecureBank Fraud Prevention Department. We've detected a suspicious transaction on your account and need to verify it with you. May I have your name please?"
+
+
+_INSTRUCTIONS = f"""You are a professional, calm, and reassuring Fraud Detection Representative for SecureBank.
+
+YOUR ROLE:
+- You work in the bank's fraud prevention department
+- Your job is to verify suspicious transactions with customers
+- Be empathetic, professional, and never accusatory
+- Use a warm but formal tone
+
+YOUR PROCESS:
+
+1. GREETING (Played automatically when the call begins):
+- The caller has already heard: "{GREETING}"
+- Do not repeat the greeting - listen for their name
+
+2. LOAD FRAUD CASE:
+- Call the 'load_fraud_case' function with the name they provided
+- This retrieves the suspicious transaction details from our system
+- If no case found, say: "I'm sorry, I couldn't find an account with that name. Please call our main line at [number]. Thank you."
+
+3. VERIFY IDENTITY (Security Question):
+- IMPORTANT: First call 'get_security_question' to retrieve the actual security question
+- Say: "To verify your identity, I have a security question for you: " and then ask the question returned by the function
+- Wait for their answer
+- Call: verify_customer(answer) with their response
+- If verification fails (function returns false):
+    - Say: "I apologize, but I'm unable to verify your identity at this time. For security reasons, please call our main line to confirm this transaction. Thank you for banking with us."
+    - End the conversation
+
+4. READ SUSPICIOUS TRANSACTION (Only if verification passes):
+- Say: "Thank you for verifying. Here's the transaction we're investigating:"
+- Call: get_transaction_details() to retrieve the formatted transaction details from the database
+- Read the transaction details exactly as returned by the function
+- Say: "Did you authorize this transaction? Please say yes or no."
+
+5. HANDLE THEIR RESPONSE:
+- If they say YES (they made it):
+    - Say: "Thank you for confirming. This transaction is marked as legitimate. Your account is secure."
+    - Call: confirm_transaction(true)
+
+- If they say NO (they didn't make it):
+    - Say: "Thank you for reporting this. We're immediately blocking your card and initiating a fraud dispute. You should receive a replacement card within 3-5 business days."
+    - Call: confirm_transaction(false)
+
+6. CLOSE THE CALL:
+- Wait for the function to return the confirmation message
+- Say: "We've updated your account. Thank you for being vigilant about your security. Is there anything else I can help you with?"
+- If they say no, say: "Thank you for banking with us. Goodbye."
+
+CRITICAL RULES:
+- NEVER ask for full card numbers, PIN, password, CVV, or any sensitive information
+- ONLY use the database fields for verification (security question only)
+- Be professional and calm - never accusatory
+- Always call the appropriate function at the right time
+- If the function fails, explain in a reassuring way
+- Use the exact transaction details from the database, don't improvise
+- Keep the conversation conversational but professional
+- Be empathetic - fraud is stressful for customers
+"""
+
+
+class FraudAlertAgent(Agent):
     def __init__(self) -> None:
-        super().__init__(
-            instructions="""You are a professional, calm, and reassuring Fraud Detection Representative for SecureBank.
-
-                YOUR ROLE:
-                - You work in the bank's fraud prevention department
-                - Your job is to verify suspicious transactions with customers
-                - Be empathetic, professional, and never accusatory
-                - Use a warm but formal tone
-
-                YOUR PROCESS:
-
-                1. GREETING (Start immediately when call begins):
-                - Greet warmly: "Hello, this is SecureBank Fraud Prevention Department. We've detected a suspicious transaction on your account and need to verify it with you. May I have your name please?"
-                - Listen for their name
-
-                2. LOAD FRAUD CASE:
-                - Call the 'load_fraud_case' function with the name they provided
-                - This retrieves the suspicious transaction details from our system
-                - If no case found, say: "I'm sorry, I couldn't find an account with that name. Please call our main line at [number]. Thank you."
-
-                3. VERIFY IDENTITY (Security Question):
-                - IMPORTANT: First call 'get_security_question' to retrieve the actual security question
-                - Say: "To verify your identity, I have a security question for you: " and then ask the question returned by the function
-                - Wait for their answer
-                - Call: verify_customer(answer) with their response
-                - If verification fails (function returns false):
-                    - Say: "I apologize, but I'm unable to verify your identity at this time. For security reasons, please call our main line to confirm this transaction. Thank you for banking with us."
-                    - End the conversation
-
-                4. READ SUSPICIOUS TRANSACTION (Only if verification passes):
-                - Say: "Thank you for verifying. Here's the transaction we're investigating:"
-                - Call: get_transaction_details() to retrieve the formatted transaction details from the database
-                - Read the transaction details exactly as returned by the function
-                - Say: "Did you authorize this transaction? Please say yes or no."
-
-                5. HANDLE THEIR RESPONSE:
-                - If they say YES (they made it):
-                    - Say: "Thank you for confirming. This transaction is marked as legitimate. Your account is secure."
-                    - Call: confirm_transaction(true)
-                
-                - If they say NO (they didn't make it):
-                    - Say: "Thank you for reporting this. We're immediately blocking your card and initiating a fraud dispute. You should receive a replacement card within 3-5 business days."
-                    - Call: confirm_transaction(false)
-
-                6. CLOSE THE CALL:
-                - Wait for the function to return the confirmation message
-                - Say: "We've updated your account. Thank you for being vigilant about your security. Is there anything else I can help you with?"
-                - If they say no, say: "Thank you for banking with us. Goodbye."
-
-                CRITICAL RULES:
-                - NEVER ask for full card numbers, PIN, password, CVV, or any sensitive information
-                - ONLY use the database fields for verification (security question only)
-                - Be professional and calm - never accusatory
-                - Always call the appropriate function at the right time
-                - If the function fails, explain in a reassuring way
-                - Use the exact transaction details from the database, don't improvise
-                - Keep the conversation conversational but professional
-                - Be empathetic - fraud is stressful for customers
-            """
-            )
-        
+        super().__init__(instructions=_INSTRUCTIONS)
+
         self.current_fraud_case = None
+        self._dirty = False
+        self._pending_flush: Optional[asyncio.Task] = None
         
     @function_tool
     async def load_fraud_case(self, userName: str = None):
@@ -114,10 +220,9 @@ class RazorpaySDR(Agent):
                 If no case is found, returns an error message asking them to call the bank.
         """
         
-        fraud_cases = Path(__file__).parent.parent / "shared-data" / "fraud_cases.json"
-        if fraud_cases.exists():
+        if FRAUD_CASES_PATH.exists():
             try:
-                with open (fraud_cases, 'r') as f:
+                with open (FRAUD_CASES_PATH, 'r') as f:
                     frauds = json.load(f)
                     
             except:
@@ -127,13 +232,13 @@ class RazorpaySDR(Agent):
             
         for fraud in frauds:
             if fraud['userName'].lower() == userName.lower():
-                self.current_fraud_case = fraud
+                self.current_fraud_case = FraudCase.from_dict(fraud)
         
         if self.current_fraud_case:
-            logger.info(f"Loaded fraud case for: {userName}")
+            logger.info("Loaded fraud case for: %s", userName)
             return "Great! I found your account. Let me verify your identity first."
     
-        logger.warning(f"No fraud case found for: {userName}")
+        logger.warning("No fraud case found for: %s", userName)
         return "I'm sorry, I couldn't find an account with that name. Please call our main line. Thank you."
             
     @function_tool
@@ -147,8 +252,8 @@ class RazorpaySDR(Agent):
             The security question string (e.g., "What is your mother's maiden name?")
         """
         if self.current_fraud_case:
-            question = self.current_fraud_case['securityQuestion']
-            logger.info(f"Retrieved security question for case {self.current_fraud_case['id']}")
+            question = self.current_fraud_case.securityQuestion
+            logger.info("Retrieved security question for case %s", self.current_fraud_case.id)
             return question
         else:
             return "Unable to retrieve security question. Please try again."
@@ -174,14 +279,14 @@ class RazorpaySDR(Agent):
                 customer should be directed to call the bank's main line.
         """
         
-        correct_answer = self.current_fraud_case['securityAnswer']
+        correct_answer = self.current_fraud_case.securityAnswer
         if answer.lower() == correct_answer.lower():
             verification_passed = True
         else:
             verification_passed = False
             
         if verification_passed:
-            logger.info(f"Customer verified successfully")
+            logger.info("Customer verified successfully")
             return True
         
         else:
@@ -201,8 +306,9 @@ class RazorpaySDR(Agent):
             merchant name, time, category, source, and location.
         """
         if self.current_fraud_case:
-            details = f"We detected a {self.current_fraud_case['transactionCategory']} transaction for {self.current_fraud_case['transactionAmount']} at {self.current_fraud_case['transactionName']} on {self.current_fraud_case['transactionTime']} from {self.current_fraud_case['transactionSource']}. This transaction was made in {self.current_fraud_case['location']}."
-            logger.info(f"Retrieved transaction details for case {self.current_fraud_case['id']}")
+            case = self.current_fraud_case
+            details = f"We detected a {case.transactionCategory} transaction for {case.transactionAmount} at {case.transactionName} on {case.transactionTime} from {case.transactionSource}. This transaction was made in {case.location}."
+            logger.info("Retrieved transaction details for case %s", case.id)
             return details
         else:
             return "Unable to retrieve transaction details. Please try again."
@@ -232,27 +338,18 @@ class RazorpaySDR(Agent):
         """
         
         if is_legitimate:
-            self.current_fraud_case["status"] = "confirmed_safe"
-            self.current_fraud_case["outcome"] = "safe"
-            self.current_fraud_case["outcomeNote"] = "Customer confirmed transaction as legitimate."
+            self.current_fraud_case.status = "confirmed_safe"
+            self.current_fraud_case.outcome = "safe"
+            self.current_fraud_case.outcomeNote = "Customer confirmed transaction as legitimate."
             
         else:
-            self.current_fraud_case["status"] = "confirmed_fraud"
-            self.current_fraud_case["outcome"] = "fraudulent"
-            self.current_fraud_case["outcomeNote"] = "Customer denied transaction. Card blocked and dispute initiated."
-            
-        fraud_cases = Path(__file__).parent.parent / "shared-data" / "fraud_cases.json"
-        with open (fraud_cases, 'r') as f:
-            frauds = json.load(f)
+            self.current_fraud_case.status = "confirmed_fraud"
+            self.current_fraud_case.outcome = "fraudulent"
+            self.current_fraud_case.outcomeNote = "Customer denied transaction. Card blocked and dispute initiated."
             
-        for fraud in frauds:
-            if fraud['id'] == self.current_fraud_case['id']:
-                fraud.update(self.current_fraud_case)  
+        self._schedule_flush()
                 
-        with open(fraud_cases, 'w') as f:
-            json.dump(frauds, f, indent=2)
-                
-        logger.info(f"Transaction marked as {self.current_fraud_case['outcome']} for case {self.current_fraud_case['id']}")
+        logger.info("Transaction marked as %s for case %s", self.current_fraud_case.outcome, self.current_fraud_case.id)
                 
         if is_legitimate:
             return "Transaction confirmed as safe. Your account is secure. Thank you."
@@ -260,17 +357,64 @@ class RazorpaySDR(Agent):
         else:
             return "We've blocked your card and initiated a dispute. You'll receive a replacement card in 3-5 business days."
 
+    def _schedule_flush(self):
+        """Mark the current case dirty and make sure a debounced write is pending."""
+        self._dirty = True
+        if self._pending_flush is None or self._pending_flush.done():
+            self._pending_flush = asyncio.create_task(self._flush_after_delay())
+
+    async def _flush_after_delay(self):
+        while self._dirty:
+            await asyncio.sleep(_FLUSH_DELAY)
+            if not await self._write_fraud_case():
+                # Leave the case dirty; flush_pending_writes tries once more at call end
+                return
+
+    async def _write_fraud_case(self) -> bool:
+        """Persist the current case if it has unsaved changes. Returns False if the write failed."""
+        if not self._dirty:
+            return True
+        case = asdict(self.current_fraud_case)
+        self._dirty = False
+        try:
+            await asyncio.to_thread(_save_fraud_case, case)
+        except Exception:
+            self._dirty = True
+            # The caller has already been told the outcome, so make the lost update easy to find
+            logger.exception(
+                "Failed to save fraud case %s (status=%s, outcome=%s)",
+                case["id"], case["status"], case["outcome"],
+            )
+            return False
+        return True
+
+    async def flush_pending_writes(self):
+        """Wait for any debounced write and persist whatever is still dirty. Called at call end."""
+        if self._pending_flush is not None:
+            await self._pending_flush
+        await self._write_fraud_case()
+
+
+def _save_fraud_case(case: dict):
+    """Merge an updated case into fraud_cases.json."""
+    with open(FRAUD_CASES_PATH, 'r') as f:
+        frauds = json.load(f)
+
+    for fraud in frauds:
+        if fraud['id'] == case['id']:
+            fraud.update(case)
+
+    with open(FRAUD_CASES_PATH, 'w') as f:
+        json.dump(frauds, f, indent=2)
+
+
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
 
-async def entrypoint(ctx: JobContext):
-    # Logging setup
-    ctx.log_context_fields = {
-        "room": ctx.room.name,
-    }
 
-    # Set up a voice AI pipeline
-    session = AgentSession(
+def build_session(ctx: JobContext) -> AgentSession:
+    """Build the voice AI pipeline (STT, LLM, TTS, turn detection) for a job."""
+    return AgentSession(
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(
                 model="gemini-2.5-flash",
@@ -278,7 +422,7 @@ async def entrypoint(ctx: JobContext):
         tts=murf.TTS(
                 voice="en-US-matthew", 
                 style="Conversation",
-                tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+                tokenizer=ClauseTokenizer(),
                 text_pacing=True
             ),
         turn_detection=MultilingualModel(),
@@ -286,6 +430,16 @@ async def entrypoint(ctx: JobContext):
         preemptive_generation=True,
     )
 
+
+async def entrypoint(ctx: JobContext):
+    # Logging setup
+    ctx.log_context_fields = {
+        "room": ctx.room.name,
+    }
+
+    # Set up a voice AI pipeline
+    session = build_session(ctx)
+
     # Metrics collection
     usage_collector = metrics.UsageCollector()
 
@@ -296,13 +450,17 @@ async def entrypoint(ctx: JobContext):
 
     async def log_usage():
         summary = usage_collector.get_summary()
-        logger.info(f"Usage: {summary}")
+        logger.info("Usage: %s", summary)
 
     ctx.add_shutdown_callback(log_usage)
 
-    # Start the session with the SDR agent
+    agent = FraudAlertAgent()
+    # Make sure a debounced case update isn't lost when the call ends
+    ctx.add_shutdown_callback(agent.flush_pending_writes)
+
+    # Start the session with the fraud alert agent
     await session.start(
-        agent=RazorpaySDR(),
+        agent=agent,
         room=ctx.room,
         room_input_options=RoomInputOptions(
             noise_cancellation=noise_cancellation.BVC(),
@@ -312,6 +470,22 @@ async def entrypoint(ctx: JobContext):
     # Join the room and connect to the user
     await ctx.connect()
 
+    # Speak the fixed greeting directly so turn 0 skips the LLM round-trip; TTS streams it as it's synthesized
+    try:
+        greeting = session.say(GREETING)
+        await greeting
+        # Synthesis errors are handled inside the speech task rather than raised here,
+        # so check whether any of the greeting actually made it into the conversation
+        played = greeting.interrupted or any(item.type == "message" for item in greeting.chat_items)
+    except Exception:
+        logger.exception("Failed to play the greeting")
+        played = False
+
+    if not played:
+        # The instructions tell the LLM the caller already heard the greeting, so don't leave them in silence
+        logger.warning("Greeting was not played, asking the LLM to greet the caller instead")
+        session.generate_reply(instructions=f"Greet the caller with: {GREETING}")
+
 
 if __name__ == "__main__":
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
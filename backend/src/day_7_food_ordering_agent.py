@@ -1,9 +1,15 @@
+import asyncio
 import logging
 import json
+import functools
+import heapq
+from dataclasses import asdict, dataclass
+import os
 from pathlib import Path
 from datetime import datetime
+from types import MappingProxyType
 from typing import Optional
-import uuid
+import secrets
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -26,79 +32,167 @@ logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
+_SHARED_DATA = Path(__file__).resolve().parent.parent / "shared-data"
+_CATALOG_PATH = _SHARED_DATA / "catalog.json"
+_ORDERS_DIR = _SHARED_DATA / "orders"
+_ORDERS_DIR.mkdir(exist_ok=True)
+
+
+# Largest quantity add_to_cart/update_quantity accept for a single cart line
+_MAX_QUANTITY = 100
+
+# search_catalog only reads out this many matches
+_MAX_SEARCH_RESULTS = 10
+
+# Items added by get_recipe_ingredients, keyed by lowercased dish name (read-only)
+_RECIPES = MappingProxyType({
+    "pasta": ("Spaghetti Pasta (500g)", "Tomato Pasta Sauce (400ml)", "Cheddar Cheese (200g)"),
+    "sandwich": ("Whole Wheat Bread", "Chicken Deli Meat (200g)", "Cheddar Cheese (200g)"),
+    "peanut butter sandwich": ("Whole Wheat Bread", "Peanut Butter (500g)"),
+    "breakfast": ("Eggs (12 pack)", "Whole Wheat Bread", "Fresh Milk (1L)", "Granola Cereal (400g)"),
+    "pizza": ("Frozen Margherita Pizza",),
+    "salad": ("Fresh Spinach (500g)", "Fresh Tomatoes (1kg)", "Red Apples (1kg)"),
+    "coffee": ("Instant Coffee (200g)", "Fresh Milk (1L)")
+})
+
+
+@functools.lru_cache(maxsize=1)
+def _load_catalog() -> dict:
+    """Load and parse catalog.json once; every tool call reuses the parsed catalog.
+
+    Returns a dict with the raw item list plus lookup indexes:
+    - items: list of catalog items in file order
+    - by_name: lowercased item name -> item
+    - by_id: item id -> item
+    - search_index: (lowercased name/category/tags blob, item) pairs for substring search
+    - recipes: dish -> (ingredient name, item id or None if not in the catalog) pairs
+    """
+    try:
+        items = json.loads(_CATALOG_PATH.read_text())
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error("Failed to load catalog from %s: %s", _CATALOG_PATH, e)
+        raise
+    by_name = {item['name'].lower(): item for item in items}
+    return {
+        "items": items,
+        "by_name": by_name,
+        "by_id": {item['id']: item for item in items},
+        # Fields are newline-separated so a query can't match across two of them
+        "search_index": [
+            ("\n".join([item['name'].lower(), item['category'].lower(), *(tag.lower() for tag in item.get('tags', []))]), item)
+            for item in items
+        ],
+        # Ingredient names are resolved to catalog ids up front so lookups per call are O(1)
+        "recipes": {
+            dish: [
+                (ingredient, by_name[ingredient.lower()]['id'] if ingredient.lower() in by_name else None)
+                for ingredient in ingredients
+            ]
+            for dish, ingredients in _RECIPES.items()
+        },
+    }
+
+
+_INSTRUCTIONS = """You are a friendly and helpful Food & Grocery Ordering Assistant for FreshCart, your favorite online food and grocery delivery service.
+
+YOUR ROLE:
+- Help customers order groceries, snacks, and prepared foods
+- Maintain a shopping cart throughout the conversation
+- Provide recommendations and answer questions about items
+- Process orders when customers are ready
+
+YOUR PROCESS:
+
+1. GREETING:
+- Greet warmly: "Hello! Welcome to FreshCart. I'm your shopping assistant. What can I help you order today? We have groceries, snacks, prepared foods, and drinks."
+- Listen for what they want to order
+
+2. UNDERSTAND THEIR REQUEST:
+- If they ask for specific items: "I'll add that to your cart."
+- If they ask for "ingredients for [dish]": Intelligently add multiple related items
+  - Example: "ingredients for pasta" → add pasta, sauce, and cheese
+  - Example: "ingredients for a sandwich" → add bread and deli meat
+- If they ask about items: "Let me search our catalog for you."
+- Always confirm what you're adding: "I've added 2 loaves of bread to your cart."
+
+3. MANAGE THE CART:
+- Keep track of items, quantities, and prices
+- When they ask "What's in my cart?" or "Show me my cart":
+  - Call: get_cart_summary() to get formatted cart details
+  - Read the summary exactly as returned
+- Support cart operations:
+  - Adding items: "I've added [item] to your cart."
+  - Removing items: "I've removed [item] from your cart."
+  - Updating quantities: "I've updated [item] to [quantity]."
+
+4. HANDLE SPECIAL REQUESTS:
+- Dietary preferences: "I can filter for vegan, gluten-free, or organic items."
+- Budget concerns: "I'll help you find items within your budget."
+- Allergies/preferences: "I'll keep that in mind and won't suggest [item]."
+
+5. DETECT ORDER COMPLETION:
+- Listen for phrases like:
+  - "That's all"
+  - "I'm done"
+  - "Place my order"
+  - "Check out"
+  - "Complete the order"
+- When you detect this, say: "Great! Let me confirm your order."
+
+6. CONFIRM AND PLACE ORDER:
+- Call: get_cart_summary() to show final cart
+- Call: place_order() to save the order to JSON
+- Announce: "Your order has been placed! You can expect delivery in 30-45 minutes."
+- Provide confirmation: "Thank you for ordering with FreshCart!"
+
+7. POST-ORDER:
+- If they ask "Where's my order?": Offer to check status
+- If they want to add more: "Would you like to start a new order or add more items?"
+- Be helpful and friendly throughout
+
+CRITICAL RULES:
+- ALWAYS confirm items before adding to cart
+- ALWAYS use function tools to manage cart - never make up cart contents
+- Keep quantities reasonable (1-10 items per product typically)
+- Be conversational but professional
+- If unsure about an item, ask clarifying questions
+- Never add items without explicit or clear implied consent
+- Use exact prices and item names from the catalog
+- Be empathetic about delivery times and policies
+"""
+
+
+@dataclass
+class CartLine:
+    """One product line in the cart."""
+
+    __slots__ = ("category", "name", "price", "quantity")
+
+    name: str
+    quantity: int
+    price: int
+    category: str
+
+
+def _write_order_file(path: Path, data: bytes) -> None:
+    """Write an order file with raw os.write calls; orders are a few KB, so buffered IO is pure overhead."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
 
 class FoodOrderingAgent(Agent):
     def __init__(self) -> None:
-        super().__init__(
-            instructions="""You are a friendly and helpful Food & Grocery Ordering Assistant for FreshCart, your favorite online food and grocery delivery service.
-
-                YOUR ROLE:
-                - Help customers order groceries, snacks, and prepared foods
-                - Maintain a shopping cart throughout the conversation
-                - Provide recommendations and answer questions about items
-                - Process orders when customers are ready
-
-                YOUR PROCESS:
-
-                1. GREETING:
-                - Greet warmly: "Hello! Welcome to FreshCart. I'm your shopping assistant. What can I help you order today? We have groceries, snacks, prepared foods, and drinks."
-                - Listen for what they want to order
-
-                2. UNDERSTAND THEIR REQUEST:
-                - If they ask for specific items: "I'll add that to your cart."
-                - If they ask for "ingredients for [dish]": Intelligently add multiple related items
-                  - Example: "ingredients for pasta" → add pasta, sauce, and cheese
-                  - Example: "ingredients for a sandwich" → add bread and deli meat
-                - If they ask about items: "Let me search our catalog for you."
-                - Always confirm what you're adding: "I've added 2 loaves of bread to your cart."
-
-                3. MANAGE THE CART:
-                - Keep track of items, quantities, and prices
-                - When they ask "What's in my cart?" or "Show me my cart":
-                  - Call: get_cart_summary() to get formatted cart details
-                  - Read the summary exactly as returned
-                - Support cart operations:
-                  - Adding items: "I've added [item] to your cart."
-                  - Removing items: "I've removed [item] from your cart."
-                  - Updating quantities: "I've updated [item] to [quantity]."
-
-                4. HANDLE SPECIAL REQUESTS:
-                - Dietary preferences: "I can filter for vegan, gluten-free, or organic items."
-                - Budget concerns: "I'll help you find items within your budget."
-                - Allergies/preferences: "I'll keep that in mind and won't suggest [item]."
-
-                5. DETECT ORDER COMPLETION:
-                - Listen for phrases like:
-                  - "That's all"
-                  - "I'm done"
-                  - "Place my order"
-                  - "Check out"
-                  - "Complete the order"
-                - When you detect this, say: "Great! Let me confirm your order."
-
-                6. CONFIRM AND PLACE ORDER:
-                - Call: get_cart_summary() to show final cart
-                - Call: place_order() to save the order to JSON
-                - Announce: "Your order has been placed! You can expect delivery in 30-45 minutes."
-                - Provide confirmation: "Thank you for ordering with FreshCart!"
-
-                7. POST-ORDER:
-                - If they ask "Where's my order?": Offer to check status
-                - If they want to add more: "Would you like to start a new order or add more items?"
-                - Be helpful and friendly throughout
-
-                CRITICAL RULES:
-                - ALWAYS confirm items before adding to cart
-                - ALWAYS use function tools to manage cart - never make up cart contents
-                - Keep quantities reasonable (1-10 items per product typically)
-                - Be conversational but professional
-                - If unsure about an item, ask clarifying questions
-                - Never add items without explicit or clear implied consent
-                - Use exact prices and item names from the catalog
-                - Be empathetic about delivery times and policies
-            """
-        )
+        super().__init__(instructions=_INSTRUCTIONS)
         self.cart = {}  
+        # Lowercased item name -> item id for everything in the cart
+        self._cart_name_index = {}
+        # Running sum of quantity * price over the cart, kept in step with every cart change
+        self._cart_total = 0
         
     @function_tool
     async def search_catalog(self, query: str = None):
@@ -107,41 +201,49 @@ class FoodOrderingAgent(Agent):
         This function searches the food catalog for items matching the query.
         Can search by item name, category, or tags.
         
+        Multi-word queries (e.g., "vegan breakfast") match items containing any
+        of the words, with items matching more of them listed first.
+        
         Args:
             query: Search term (e.g., "bread", "pasta", "vegan", "breakfast")
         
         Returns:
             A formatted list of matching items with names, prices, categories, and tags
         """
-        catalog_path = Path(__file__).parent.parent / "shared-data" / "catalog.json"
-        
-        try:
-            with open(catalog_path, 'r') as f:
-                catalog = json.load(f)
-        except:
-            return "Sorry, I couldn't access the catalog. Please try again."
+        catalog = _load_catalog()
         
         query_lower = query.lower()
-        results = []
-        
-        for item in catalog:
-            name_match = query_lower in item['name'].lower()
-            category_match = query_lower in item['category'].lower()
-            tags_match = any(query_lower in tag.lower() for tag in item.get('tags', []))
-            
-            if name_match or category_match or tags_match:
-                results.append(item)
+        # The whole query plus each meaningful word in it; very short words ("a", "of") are skipped
+        terms = {query_lower, *(word for word in query_lower.split() if len(word) > 2)}
+        
+        # Count every match but only keep the best ones we'll actually read out: a min-heap
+        # of at most _MAX_SEARCH_RESULTS entries whose root is the weakest match kept so far.
+        # Positions are unique, so ties never fall through to comparing the item dicts.
+        match_count = 0
+        best = []
+        for position, (search_blob, item) in enumerate(catalog["search_index"]):
+            score = sum(term in search_blob for term in terms)
+            if not score:
+                continue
+            match_count += 1
+            entry = (score, -position, item)
+            if len(best) < _MAX_SEARCH_RESULTS:
+                heapq.heappush(best, entry)
+            elif entry[:2] > best[0][:2]:
+                heapq.heapreplace(best, entry)
+        
+        # Highest score first, in catalog order on ties
+        results = [item for _, _, item in sorted(best, key=lambda entry: entry[:2], reverse=True)]
         
         if not results:
-            logger.warning(f"No items found for query: {query}")
+            logger.warning("No items found for query: %s", query)
             return f"I couldn't find any items matching '{query}'. Would you like to try a different search?"
         
-        response = f"I found {len(results)} items for you:\n"
-        for item in results[:10]:  # Limit to 10 results
-            response += f"- {item['name']}: ₹{item['price']} ({item['category']})\n"
+        lines = [f"I found {match_count} items for you:"]
+        lines.extend(f"- {item['name']}: ₹{item['price']} ({item['category']})" for item in results)
         
-        logger.info(f"Search results for '{query}': {len(results)} items found")
-        return response
+        logger.info("Search results for '%s': %d items found", query, match_count)
+        return "\n".join(lines)
 
     @function_tool
     async def add_to_cart(self, item_name: str = None, quantity: int = 1):
@@ -157,37 +259,33 @@ class FoodOrderingAgent(Agent):
         Returns:
             Confirmation message with item name, quantity, and price
         """
-        catalog_path = Path(__file__).parent.parent / "shared-data" / "catalog.json"
+        if not isinstance(quantity, int) or not 1 <= quantity <= _MAX_QUANTITY:
+            return f"Quantity must be between 1 and {_MAX_QUANTITY}."
         
-        try:
-            with open(catalog_path, 'r') as f:
-                catalog = json.load(f)
-        except:
-            return "Sorry, I couldn't access the catalog. Please try again."
+        catalog = _load_catalog()
         
-        item_found = None
-        for item in catalog:
-            if item['name'].lower() == item_name.lower():
-                item_found = item
-                break
+        item_found = catalog["by_name"].get(item_name.lower())
         
         if not item_found:
-            logger.warning(f"Item not found: {item_name}")
+            logger.warning("Item not found: %s", item_name)
             return f"I couldn't find '{item_name}' in our catalog. Would you like me to search for something similar?"
         
         item_id = item_found['id']
         if item_id in self.cart:
-            self.cart[item_id]['quantity'] += quantity
+            self.cart[item_id].quantity += quantity
         else:
-            self.cart[item_id] = {
-                'name': item_found['name'],
-                'quantity': quantity,
-                'price': item_found['price'],
-                'category': item_found['category']
-            }
-        
-        total_price = self.cart[item_id]['quantity'] * self.cart[item_id]['price']
-        logger.info(f"Added {quantity}x {item_name} to cart. Total: ₹{total_price}")
+            self.cart[item_id] = CartLine(
+                name=item_found['name'],
+                quantity=quantity,
+                price=item_found['price'],
+                category=item_found['category'],
+            )
+            self._cart_name_index[item_found['name'].lower()] = item_id
+        self._cart_total += quantity * item_found['price']
+        
+        if logger.isEnabledFor(logging.INFO):
+            total_price = self.cart[item_id].quantity * self.cart[item_id].price
+            logger.info("Added %dx %s to cart. Total: ₹%s", quantity, item_name, total_price)
         return f"Great! I've added {quantity} {item_found['name']} to your cart at ₹{item_found['price']} each."
 
     @function_tool
@@ -202,19 +300,16 @@ class FoodOrderingAgent(Agent):
         Returns:
             Confirmation message about the removal
         """
-        item_id = None
-        for id, item in self.cart.items():
-            if item['name'].lower() == item_name.lower():
-                item_id = id
-                break
+        item_id = self._cart_name_index.pop(item_name.lower(), None)
         
         if not item_id:
-            logger.warning(f"Item not in cart: {item_name}")
+            logger.warning("Item not in cart: %s", item_name)
             return f"I don't see '{item_name}' in your cart. Would you like to add something else?"
         
         removed_item = self.cart.pop(item_id)
-        logger.info(f"Removed {removed_item['name']} from cart")
-        return f"Done! I've removed {removed_item['name']} from your cart."
+        self._cart_total -= removed_item.quantity * removed_item.price
+        logger.info("Removed %s from cart", removed_item.name)
+        return f"Done! I've removed {removed_item.name} from your cart."
 
     @function_tool
     async def update_quantity(self, item_name: str = None, quantity: int = 1):
@@ -229,24 +324,26 @@ class FoodOrderingAgent(Agent):
         Returns:
             Confirmation message with new quantity and total
         """
+        if not isinstance(quantity, int):
+            return f"Quantity must be a whole number between 1 and {_MAX_QUANTITY}."
         if quantity < 1:
             return "Quantity must be at least 1. If you want to remove this item, just say so!"
+        if quantity > _MAX_QUANTITY:
+            return f"Sorry, we can only take up to {_MAX_QUANTITY} of one item per order."
         
-        item_id = None
-        for id, item in self.cart.items():
-            if item['name'].lower() == item_name.lower():
-                item_id = id
-                break
+        item_id = self._cart_name_index.get(item_name.lower())
         
         if not item_id:
-            logger.warning(f"Item not in cart: {item_name}")
+            logger.warning("Item not in cart: %s", item_name)
             return f"I don't see '{item_name}' in your cart. Would you like to add it first?"
         
-        old_quantity = self.cart[item_id]['quantity']
-        self.cart[item_id]['quantity'] = quantity
-        total_price = quantity * self.cart[item_id]['price']
+        line = self.cart[item_id]
+        old_quantity = line.quantity
+        line.quantity = quantity
+        self._cart_total += (quantity - old_quantity) * line.price
+        total_price = quantity * line.price
         
-        logger.info(f"Updated {item_name} quantity from {old_quantity} to {quantity}")
+        logger.info("Updated %s quantity from %s to %s", item_name, old_quantity, quantity)
         return f"Updated! You now have {quantity} {item_name} in your cart at a total of ₹{total_price}."
 
     @function_tool
@@ -262,17 +359,14 @@ class FoodOrderingAgent(Agent):
         if not self.cart:
             return "Your cart is empty. What would you like to order?"
         
-        summary = "Here's what's in your cart:\n"
-        grand_total = 0
+        grand_total = self._cart_total
+        lines = ["Here's what's in your cart:"]
+        lines.extend(f"- {line.quantity}x {line.name}: ₹{line.quantity * line.price}" for line in self.cart.values())
+        lines.append("")
+        lines.append(f"Total: ₹{grand_total}")
         
-        for item_id, item in self.cart.items():
-            item_total = item['quantity'] * item['price']
-            grand_total += item_total
-            summary += f"- {item['quantity']}x {item['name']}: ₹{item_total}\n"
-        
-        summary += f"\nTotal: ₹{grand_total}"
-        logger.info(f"Cart summary requested. Items: {len(self.cart)}, Total: ₹{grand_total}")
-        return summary
+        logger.info("Cart summary requested. Items: %d, Total: ₹%s", len(self.cart), grand_total)
+        return "\n".join(lines)
 
     @function_tool
     async def get_recipe_ingredients(self, dish: str = None):
@@ -287,59 +381,39 @@ class FoodOrderingAgent(Agent):
         Returns:
             A list of items to add to the cart for the dish
         """
-        catalog_path = Path(__file__).parent.parent / "shared-data" / "catalog.json"
-        
-        try:
-            with open(catalog_path, 'r') as f:
-                catalog = json.load(f)
-        except:
-            return "Sorry, I couldn't access the catalog. Please try again."
-        
-        recipes = {
-            "pasta": ["Spaghetti Pasta (500g)", "Tomato Pasta Sauce (400ml)", "Cheddar Cheese (200g)"],
-            "sandwich": ["Whole Wheat Bread", "Chicken Deli Meat (200g)", "Cheddar Cheese (200g)"],
-            "peanut butter sandwich": ["Whole Wheat Bread", "Peanut Butter (500g)"],
-            "breakfast": ["Eggs (12 pack)", "Whole Wheat Bread", "Fresh Milk (1L)", "Granola Cereal (400g)"],
-            "pizza": ["Frozen Margherita Pizza"],
-            "salad": ["Fresh Spinach (500g)", "Fresh Tomatoes (1kg)", "Red Apples (1kg)"],
-            "coffee": ["Instant Coffee (200g)", "Fresh Milk (1L)"]
-        }
+        catalog = _load_catalog()
         
         dish_lower = dish.lower()
-        if dish_lower not in recipes:
-            logger.warning(f"Recipe not found for: {dish}")
+        if dish_lower not in catalog["recipes"]:
+            logger.warning("Recipe not found for: %s", dish)
             return f"I don't have a recipe for '{dish}'. Would you like me to suggest something else?"
         
-        ingredients = recipes[dish_lower]
-        response = f"For {dish}, I'll add:\n"
+        lines = [f"For {dish}, I'll add:"]
         added_count = 0
         
-        for ingredient in ingredients:
-            # Find and add each ingredient - case insensitive search
-            item_found = None
-            for item in catalog:
-                if item['name'].lower() == ingredient.lower():
-                    item_found = item
-                    break
+        for ingredient, item_id in catalog["recipes"][dish_lower]:
+            item_found = catalog["by_id"].get(item_id)
             
             if item_found:
                 if item_found['id'] not in self.cart:
-                    self.cart[item_found['id']] = {
-                        'name': item_found['name'],
-                        'quantity': 1,
-                        'price': item_found['price'],
-                        'category': item_found['category']
-                    }
-                    response += f"✓ {item_found['name']}\n"
+                    self.cart[item_found['id']] = CartLine(
+                        name=item_found['name'],
+                        quantity=1,
+                        price=item_found['price'],
+                        category=item_found['category'],
+                    )
+                    self._cart_name_index[item_found['name'].lower()] = item_found['id']
+                    self._cart_total += item_found['price']
+                    lines.append(f"✓ {item_found['name']}")
                     added_count += 1
                 else:
-                    response += f"✓ {item_found['name']} (already in cart)\n"
+                    lines.append(f"✓ {item_found['name']} (already in cart)")
             else:
-                logger.warning(f"Ingredient '{ingredient}' not found in catalog for recipe '{dish}'")
-                response += f"✗ {ingredient} (not in catalog)\n"
+                logger.warning("Ingredient '%s' not found in catalog for recipe '%s'", ingredient, dish)
+                lines.append(f"✗ {ingredient} (not in catalog)")
         
-        logger.info(f"Added {added_count} ingredients for {dish} to cart")
-        return response
+        logger.info("Added %d ingredients for %s to cart", added_count, dish)
+        return "\n".join(lines)
 
     @function_tool
     async def place_order(self, customer_name: str = None, delivery_address: str = None):
@@ -358,38 +432,44 @@ class FoodOrderingAgent(Agent):
         if not self.cart:
             return "Your cart is empty! Add some items before placing an order."
         
-        grand_total = sum(item['quantity'] * item['price'] for item in self.cart.values())
+        grand_total = self._cart_total
+        # Snapshot the cart as plain records so the order shares nothing with the live cart
+        items_snapshot = [{"id": item_id, **asdict(line)} for item_id, line in self.cart.items()]
         
-        order_id = str(uuid.uuid4())[:8].upper()
+        order_id = secrets.token_hex(4).upper()
         order = {
             "order_id": order_id,
             "timestamp": datetime.now().isoformat(),
             "customer_name": customer_name or "Guest",
             "delivery_address": delivery_address or "Default Address",
-            "items": self.cart,
+            "items": items_snapshot,
             "total": grand_total,
             "status": "received",
             "estimated_delivery": "30-45 minutes"
         }
         
-        orders_dir = Path(__file__).parent.parent / "shared-data" / "orders"
-        orders_dir.mkdir(exist_ok=True)
-        
-        order_file = orders_dir / f"order_{order_id}.json"
+        order_file = _ORDERS_DIR / f"order_{order_id}.json"
         try:
-            with open(order_file, 'w') as f:
-                json.dump(order, f, indent=2)
+            # Compact output keeps json on its C encoder (indent= forces the pure-Python one);
+            # the write itself runs off the event loop so STT/TTS keep streaming during disk I/O
+            blob = json.dumps(order, separators=(",", ":")).encode()
+            await asyncio.to_thread(_write_order_file, order_file, blob)
         except Exception as e:
-            logger.error(f"Failed to save order: {e}")
+            logger.error("Failed to save order: %s", e)
             return "Sorry, I couldn't save your order. Please try again."
         
-        self.cart = {}
+        # Clear in place so the next order reuses the already-sized dicts
+        self.cart.clear()
+        self._cart_name_index.clear()
+        self._cart_total = 0
         
-        logger.info(f"Order placed: {order_id}, Total: ₹{grand_total}")
+        logger.info("Order placed: %s, Total: ₹%s", order_id, grand_total)
         return f"Perfect! Your order #{order_id} has been placed with a total of ₹{grand_total}. You can expect delivery in 30-45 minutes. Thank you for ordering with FreshCart!"
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    # Load the catalog up front so a missing or broken catalog.json fails at startup, not mid-call
+    _load_catalog()
 
 async def entrypoint(ctx: JobContext):
     # Logging setup
@@ -422,7 +502,7 @@ async def entrypoint(ctx: JobContext):
 
     async def log_usage():
         summary = usage_collector.get_summary()
-        logger.info(f"Usage: {summary}")
+        logger.info("Usage: %s", summary)
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -1,9 +1,12 @@
 import logging
 import json
 from pathlib import Path
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 import uuid
+from collections import deque
+from itertools import islice
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -26,102 +29,193 @@ logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
+# Only the last few events are ever shown to the LLM, so older ones are dropped
+_MAX_EVENTS = 64
+
+
+@dataclass
+class Player:
+    """The player's character."""
+
+    __slots__ = ("cls", "hp", "inventory", "name", "traits")
+
+    name: str
+    cls: str
+    hp: int
+    inventory: list[str]
+    traits: list[str]
+
+
+@dataclass
+class Event:
+    """Something that happened in the story, tagged with the turn it was recorded on."""
+
+    __slots__ = ("event", "turn")
+
+    turn: int
+    event: str
+
+
+@dataclass
+class Quest:
+    """A quest and where the player is with it."""
+
+    __slots__ = ("quest", "status")
+
+    quest: str
+    status: str
+
+
+@dataclass
+class WorldUpdate:
+    """One change to the world state, as passed to update_world_state_bulk."""
+
+    __slots__ = ("field", "key", "value")
+
+    field: str
+    key: str
+    value: str
+
+
+@dataclass
+class WorldState:
+    """Everything the Game Master tracks to keep the story consistent."""
+
+    __slots__ = (
+        "current_location",
+        "events",
+        "events_recorded",
+        "locations",
+        "npcs",
+        "player",
+        "quests",
+        "turn_count",
+        "universe",
+    )
+
+    universe: str
+    current_location: str
+    player: Player
+    npcs: dict[str, str]
+    locations: dict[str, str]
+    events: deque[Event]
+    # All events ever recorded, including ones that have fallen out of `events`
+    events_recorded: int
+    quests: list[Quest]
+    turn_count: int
+
+
+# Gemini 2.5 caches repeated prompt prefixes implicitly, and these instructions
+# open every request, so keep them static: per-session details belong in tool
+# results, not in this string.
+_GAMEMASTER_INSTRUCTIONS = """You are an immersive and dramatic Game Master running a fantasy D&D-style adventure. Your role is to guide the player through an epic story set in the mystical realm of Eldoria.
+
+WORLD SETTING:
+- You are the Game Master of Eldoria, a land of magic, ancient ruins, and dangerous creatures
+- The story takes place in a fantasy medieval world with magic, dragons, and adventure
+- Be vivid, dramatic, and immersive in your descriptions
+- Use fantasy language and create atmosphere
+
+YOUR TOOLS:
+- Call get_world_state() at the start of each turn to review what's happened so far
+- Call set_player_name(name) when the player tells you their character's name
+- Call set_current_location(location, description) when the player moves to a new area
+- Call update_world_state(field, key, value) to record NPCs, events, and quests
+- Example: update_world_state("characters", "Thorne the Tavern Keeper", "A scarred innkeeper with a mysterious past")
+- Example: update_world_state("events", "", "Player met Thorne and learned of the missing artifact")
+- When several things happen in one turn, record them together with update_world_state_bulk(updates), passing one {field, key, value} entry per change
+
+YOUR ROLE AND PROCESS:
+
+1. OPENING SCENE (First message):
+- Greet the player warmly: "Welcome, adventurer! I am your Game Master, and I will guide you through the realm of Eldoria."
+- Set the scene: Describe the starting location vividly
+- Example: "You find yourself in the bustling tavern called 'The Wandering Wyvern' in the port city of Seahaven. The smell of ale and roasted meat fills the air. Around you, merchants, sailors, and adventurers chat and laugh. A cloaked figure in the corner catches your eye..."
+- End with: "What do you do?"
+
+2. ACTIVE STORYTELLING:
+- Listen to what the player wants to do
+- Describe the consequences of their actions in vivid detail
+- Create atmosphere with sensory descriptions (sights, sounds, smells, feelings)
+- Example: "As you approach the cloaked figure, the tavern noise fades. You notice the mysterious stranger's hand rests on a concealed dagger..."
+- Always respond to player choices meaningfully
+
+3. CREATE TENSION AND CHALLENGE:
+- Introduce challenges and interesting encounters
+- NPCs with distinct personalities (the suspicious tavern keeper, the mysterious mage, etc.)
+- Environmental hazards and puzzles
+- Opportunities for the player to make meaningful choices
+
+4. DIALOGUE AND NPC INTERACTION:
+- When NPCs speak, use distinct voices and personalities in your descriptions
+- Example: "The tavern keeper, a burly man with a scarred face, leans over the bar. 'You look like trouble, friend. That's good. I've got a job that needs someone like you.'"
+- Always describe NPC reactions to player choices
+
+5. PROGRESSION OF THE STORY:
+- Build toward a mini-arc or mini-quest
+- After 3-4 exchanges, introduce a main objective or challenge
+- Examples: Find a lost artifact, help an NPC, escape danger, solve a mystery
+- Create natural pacing with calm moments and action sequences
+
+6. STORY CONSISTENCY AND WORLD STATE:
+- Use the world state to track important story elements
+- Call update_world_state() to record NPCs, events, and quests as they develop
+- Remember what has happened in previous turns
+- Maintain consistency (if an NPC is dead, they stay dead; if an item was taken, it's gone)
+- The world should feel alive and reactive to player choices
+
+7. SESSION ENDING:
+- After 8-15 exchanges, guide the story toward a conclusion
+- Reach a natural conclusion (success, failure, or cliffhanger)
+- Summarize what happened in this session
+- Offer the chance to continue or create a new adventure
+
+CRITICAL RULES:
+- NEVER break character as Game Master
+- ALWAYS end messages with "What do you do?" or similar prompt
+- Use vivid, sensory descriptions
+- Be creative and respond to player choices meaningfully
+- Keep track of story elements (names, locations, events)
+- Balance challenge with fun
+- Be dramatic and engaging - this is entertainment!
+- Create a sense of progression and advancement
+"""
+
 
 class GameMasterAgent(Agent):
     def __init__(self, room=None) -> None:
-        self.world_state = {
-            "universe": "Eldoria - A land of magic, dragons, and ancient ruins",
-            "current_location": "The Wandering Wyvern tavern, Seahaven port city",
-            "characters": {
-                "player": {
-                    "name": "Unknown adventurer",
-                    "class": "Unknown",
-                    "hp": 20,
-                    "inventory": [],
-                    "traits": []
-                },
-                "npcs": {}
-            },
-            "events": [],
-            "quests": [],
-            "turn_count": 0
-        }
+        self.world = WorldState(
+            universe="Eldoria - A land of magic, dragons, and ancient ruins",
+            current_location="The Wandering Wyvern tavern, Seahaven port city",
+            player=Player(name="Unknown adventurer", cls="Unknown", hp=20, inventory=[], traits=[]),
+            npcs={},
+            locations={},
+            events=deque(maxlen=_MAX_EVENTS),
+            events_recorded=0,
+            quests=[],
+            turn_count=0,
+        )
         self.room = room
         
-        super().__init__(
-            instructions="""You are an immersive and dramatic Game Master running a fantasy D&D-style adventure. Your role is to guide the player through an epic story set in the mystical realm of Eldoria.
-
-                WORLD SETTING:
-                - You are the Game Master of Eldoria, a land of magic, ancient ruins, and dangerous creatures
-                - The story takes place in a fantasy medieval world with magic, dragons, and adventure
-                - Be vivid, dramatic, and immersive in your descriptions
-                - Use fantasy language and create atmosphere
-
-                YOUR TOOLS:
-                - Call get_world_state() at the start of each turn to review what's happened so far
-                - Call set_player_name(name) when the player tells you their character's name
-                - Call set_current_location(location, description) when the player moves to a new area
-                - Call update_world_state(field, key, value) to record NPCs, events, and quests
-                - Example: update_world_state("characters", "Thorne the Tavern Keeper", "A scarred innkeeper with a mysterious past")
-                - Example: update_world_state("events", "", "Player met Thorne and learned of the missing artifact")
-
-                YOUR ROLE AND PROCESS:
-
-                1. OPENING SCENE (First message):
-                - Greet the player warmly: "Welcome, adventurer! I am your Game Master, and I will guide you through the realm of Eldoria."
-                - Set the scene: Describe the starting location vividly
-                - Example: "You find yourself in the bustling tavern called 'The Wandering Wyvern' in the port city of Seahaven. The smell of ale and roasted meat fills the air. Around you, merchants, sailors, and adventurers chat and laugh. A cloaked figure in the corner catches your eye..."
-                - End with: "What do you do?"
-
-                2. ACTIVE STORYTELLING:
-                - Listen to what the player wants to do
-                - Describe the consequences of their actions in vivid detail
-                - Create atmosphere with sensory descriptions (sights, sounds, smells, feelings)
-                - Example: "As you approach the cloaked figure, the tavern noise fades. You notice the mysterious stranger's hand rests on a concealed dagger..."
-                - Always respond to player choices meaningfully
-
-                3. CREATE TENSION AND CHALLENGE:
-                - Introduce challenges and interesting encounters
-                - NPCs with distinct personalities (the suspicious tavern keeper, the mysterious mage, etc.)
-                - Environmental hazards and puzzles
-                - Opportunities for the player to make meaningful choices
-
-                4. DIALOGUE AND NPC INTERACTION:
-                - When NPCs speak, use distinct voices and personalities in your descriptions
-                - Example: "The tavern keeper, a burly man with a scarred face, leans over the bar. 'You look like trouble, friend. That's good. I've got a job that needs someone like you.'"
-                - Always describe NPC reactions to player choices
-
-                5. PROGRESSION OF THE STORY:
-                - Build toward a mini-arc or mini-quest
-                - After 3-4 exchanges, introduce a main objective or challenge
-                - Examples: Find a lost artifact, help an NPC, escape danger, solve a mystery
-                - Create natural pacing with calm moments and action sequences
-
-                6. STORY CONSISTENCY AND WORLD STATE:
-                - Use the world state to track important story elements
-                - Call update_world_state() to record NPCs, events, and quests as they develop
-                - Remember what has happened in previous turns
-                - Maintain consistency (if an NPC is dead, they stay dead; if an item was taken, it's gone)
-                - The world should feel alive and reactive to player choices
-
-                7. SESSION ENDING:
-                - After 8-15 exchanges, guide the story toward a conclusion
-                - Reach a natural conclusion (success, failure, or cliffhanger)
-                - Summarize what happened in this session
-                - Offer the chance to continue or create a new adventure
-
-                CRITICAL RULES:
-                - NEVER break character as Game Master
-                - ALWAYS end messages with "What do you do?" or similar prompt
-                - Use vivid, sensory descriptions
-                - Be creative and respond to player choices meaningfully
-                - Keep track of story elements (names, locations, events)
-                - Balance challenge with fun
-                - Be dramatic and engaging - this is entertainment!
-                - Create a sense of progression and advancement
-            """
-        )
+        super().__init__(instructions=_GAMEMASTER_INSTRUCTIONS)
     
+    def _apply_update(self, field: str, key: str, value: str) -> Optional[str]:
+        """Apply one world state update and return its confirmation, or None for an unknown field."""
+        if field == "characters":
+            self.world.npcs[key] = value
+            return f"Added character '{key}' to the world."
+        if field == "locations":
+            self.world.locations[key] = value
+            return f"Noted location: '{key}'."
+        if field == "events":
+            self.world.events.append(Event(turn=self.world.turn_count, event=value))
+            self.world.events_recorded += 1
+            return f"Event recorded: {value}"
+        if field == "quests":
+            self.world.quests.append(Quest(quest=key, status=value))
+            return f"Quest added: '{key}' - {value}"
+        return None
+
     @function_tool
     async def update_world_state(
         self,
@@ -140,35 +234,42 @@ class GameMasterAgent(Agent):
             Confirmation message
         """
         try:
-            if field == "characters":
-                if "npcs" not in self.world_state["characters"]:
-                    self.world_state["characters"]["npcs"] = {}
-                self.world_state["characters"]["npcs"][key] = value
-                logger.info(f"✓ Added NPC: {key}")
-                return f"Added character '{key}' to the world."
-            
-            elif field == "locations":
-                if "locations" not in self.world_state:
-                    self.world_state["locations"] = {}
-                self.world_state["locations"][key] = value
-                logger.info(f"✓ Added location: {key}")
-                return f"Noted location: '{key}'."
-            
-            elif field == "events":
-                self.world_state["events"].append({"turn": self.world_state["turn_count"], "event": value})
-                logger.info(f"✓ Event recorded: {value}")
-                return f"Event recorded: {value}"
-            
-            elif field == "quests":
-                self.world_state["quests"].append({"quest": key, "status": value})
-                logger.info(f"✓ Quest added: {key}")
-                return f"Quest added: '{key}' - {value}"
-            
-            else:
-                return "Invalid field. Use: characters, locations, events, or quests"
+            message = self._apply_update(field, key, value)
         except Exception as e:
-            logger.error(f"Error updating world state: {e}")
+            logger.error("Error updating world state: %s", e)
             return f"Error: {str(e)}"
+
+        if message is None:
+            return "Invalid field. Use: characters, locations, events, or quests"
+        logger.info("✓ %s", message)
+        return message
+
+    @function_tool
+    async def update_world_state_bulk(self, updates: list[WorldUpdate]) -> str:
+        """Apply several world state updates in one call
+        
+        Use this instead of calling update_world_state repeatedly when a turn
+        introduces more than one NPC, location, event, or quest.
+        
+        Args:
+            updates: the updates to apply, in order; each has the same field, key and value as update_world_state
+        
+        Returns:
+            One confirmation line per update
+        """
+        results = []
+        try:
+            for update in updates:
+                message = self._apply_update(update.field, update.key, update.value)
+                if message is None:
+                    message = f"Skipped '{update.key}': invalid field '{update.field}'."
+                results.append(message)
+        except Exception as e:
+            logger.error("Error updating world state: %s", e)
+            results.append(f"Error: {e}")
+
+        logger.info("✓ Applied %s world state updates", len(results))
+        return "\n".join(results)
     
     @function_tool
     async def get_world_state(self) -> str:
@@ -177,30 +278,36 @@ class GameMasterAgent(Agent):
         Returns:
             Formatted world state summary
         """
-        self.world_state["turn_count"] += 1
-        
-        summary = f"""📖 WORLD STATE (Turn {self.world_state['turn_count']}):
-🌍 Universe: {self.world_state['universe']}
-📍 Current Location: {self.world_state['current_location']}
+        world = self.world
+        world.turn_count += 1
+        player = world.player
 
-👥 Characters:
-- Player: {self.world_state['characters']['player']['name']} (Class: {self.world_state['characters']['player']['class']}, HP: {self.world_state['characters']['player']['hp']})"""
-        
-        if self.world_state['characters']['npcs']:
-            summary += "\n- NPCs: " + ", ".join(self.world_state['characters']['npcs'].keys())
-        
-        if self.world_state['events']:
-            summary += f"\n\n📜 Recent Events ({len(self.world_state['events'])} total):"
-            for event in self.world_state['events'][-3:]:
-                summary += f"\n  • {event['event']}"
-        
-        if self.world_state['quests']:
-            summary += f"\n\n⚔️ Active Quests:"
-            for quest in self.world_state['quests']:
-                summary += f"\n  • {quest['quest']}: {quest['status']}"
-        
-        logger.info(f"World state retrieved for turn {self.world_state['turn_count']}")
-        return summary
+        lines = [
+            f"📖 WORLD STATE (Turn {world.turn_count}):",
+            f"🌍 Universe: {world.universe}",
+            f"📍 Current Location: {world.current_location}",
+            "",
+            "👥 Characters:",
+            f"- Player: {player.name} (Class: {player.cls}, HP: {player.hp})",
+        ]
+
+        if world.npcs:
+            lines.append("- NPCs: " + ", ".join(world.npcs))
+
+        if world.events:
+            lines.append("")
+            lines.append(f"📜 Recent Events ({world.events_recorded} total):")
+            # deque doesn't support slicing, so skip ahead to the last three
+            recent = islice(world.events, max(0, len(world.events) - 3), None)
+            lines.extend(f"  • {event.event}" for event in recent)
+
+        if world.quests:
+            lines.append("")
+            lines.append("⚔️ Active Quests:")
+            lines.extend(f"  • {quest.quest}: {quest.status}" for quest in world.quests)
+
+        logger.info("World state retrieved for turn %s", world.turn_count)
+        return "\n".join(lines)
     
     @function_tool
     async def set_player_name(self, name: str) -> str:
@@ -212,8 +319,8 @@ class GameMasterAgent(Agent):
         Returns:
             Confirmation message
         """
-        self.world_state['characters']['player']['name'] = name
-        logger.info(f"✓ Player name set to: {name}")
+        self.world.player.name = name
+        logger.info("✓ Player name set to: %s", name)
         return f"Adventurer '{name}' has entered the realm of Eldoria!"
     
     @function_tool
@@ -227,11 +334,9 @@ class GameMasterAgent(Agent):
         Returns:
             Confirmation message
         """
-        self.world_state['current_location'] = location_name
-        if "locations" not in self.world_state:
-            self.world_state["locations"] = {}
-        self.world_state["locations"][location_name] = description
-        logger.info(f"✓ Location changed to: {location_name}")
+        self.world.current_location = location_name
+        self.world.locations[location_name] = description
+        logger.info("✓ Location changed to: %s", location_name)
         return f"You are now at: {location_name}. {description}"
 
 
@@ -270,7 +375,7 @@ async def entrypoint(ctx: JobContext):
 
     async def log_usage():
         summary = usage_collector.get_summary()
-        logger.info(f"Usage: {summary}")
+        logger.info("Usage: %s", summary)
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -1,5 +1,8 @@
+import asyncio
 import json
 import os
+import threading
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
@@ -24,52 +27,146 @@ logger = logging.getLogger("agent")
 load_dotenv(".env.local")
 
 
-def load_catalog():
-    """Load products catalog from JSON file."""
+@dataclass
+class CatalogSnapshot:
+    """A parsed catalog plus the lookup structures the agent's tools use.
+
+    Built once per catalog version and kept in _catalog_cache, so the agent
+    reuses the snapshot prewarm already built instead of parsing again.
+    """
+
+    __slots__ = ("by_id", "products", "search_rows")
+
+    products: list
+    by_id: dict
+    # (product, normalized category, lowercase color, price) per product, for search_products_tool
+    search_rows: list
+
+    @classmethod
+    def from_products(cls, products: list) -> "CatalogSnapshot":
+        return cls(
+            products=products,
+            by_id={p["id"]: p for p in products},
+            search_rows=[
+                (p, p["category"].lower().replace("-", "").replace(" ", ""), p["color"].lower(), p["price"])
+                for p in products
+            ],
+        )
+
+
+# (mtime in ns, snapshot) from the last successful load_catalog_snapshot() call
+_catalog_cache: Optional[tuple[int, CatalogSnapshot]] = None
+
+
+def load_catalog_snapshot() -> CatalogSnapshot:
+    """Load the products catalog and its lookup structures.
+
+    The snapshot is kept in memory and only rebuilt when the catalog file's
+    modification time changes, so edits to the catalog are picked up
+    without a restart.
+    """
+    global _catalog_cache
     catalog_path = Path(__file__).parent.parent / "shared-data" / "day_9_catalog.json"
-    logger.info(f"Loading catalog from: {catalog_path}")
-    logger.info(f"Catalog file exists: {catalog_path.exists()}")
     try:
-        with open(catalog_path, 'r') as f:
-            catalog = json.load(f)
-            logger.info(f"Successfully loaded {len(catalog)} products from catalog")
-            return catalog
+        mtime = catalog_path.stat().st_mtime_ns
+        if _catalog_cache is not None and _catalog_cache[0] == mtime:
+            return _catalog_cache[1]
+        logger.info("Loading catalog from: %s", catalog_path)
+        # Read the whole file in one go and hand the bytes straight to the C parser
+        snapshot = CatalogSnapshot.from_products(json.loads(catalog_path.read_bytes()))
+        logger.info("Successfully loaded %s products from catalog", len(snapshot.products))
+        _catalog_cache = (mtime, snapshot)
+        return snapshot
     except Exception as e:
-        logger.error(f"Error loading catalog: {e}")
-        return []
+        logger.error("Error loading catalog: %s", e)
+        return CatalogSnapshot.from_products([])
 
 
-def load_orders():
-    """Load orders from JSON file."""
-    orders_path = Path(__file__).parent.parent / "shared-data" / "day_9_orders" / "orders.json"
-    if os.path.exists(orders_path):
-        try:
-            with open(orders_path, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading orders: {e}")
-            return []
-    return []
+_ORDERS_PATH = Path(__file__).parent.parent / "shared-data" / "day_9_orders" / "orders.jsonl"
+
 
+def append_order(order) -> Optional[int]:
+    """Append a single order to the JSONL orders log.
 
-def save_orders(orders):
-    """Save orders to JSON file."""
-    orders_path = Path(__file__).parent.parent / "shared-data" / "day_9_orders" / "orders.json"
+    Each order is one line, so placing an order never rewrites past orders
+    (blocking; run it off the event loop). Returns the byte offset of the
+    new line, or None if the write failed.
+    """
+    line = (json.dumps(order, separators=(",", ":")) + "\n").encode()
     try:
         # Create directory if it doesn't exist
-        orders_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(orders_path, 'w') as f:
-            json.dump(orders, f, indent=2)
+        _ORDERS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(_ORDERS_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            # O_APPEND seeks to the end right before writing, so even with other
+            # workers appending, our line ends where the file position now is
+            return os.lseek(fd, 0, os.SEEK_CUR) - len(line)
+        finally:
+            os.close(fd)
     except Exception as e:
-        logger.error(f"Error saving orders: {e}")
+        logger.error("Error saving order: %s", e)
+        return None
 
 
-class EcommerceAgent(Agent):
-    """E-commerce voice assistant following ACP-inspired patterns."""
-    
-    def __init__(self) -> None:
-        super().__init__(
-            instructions="""You are a friendly and helpful e-commerce voice shopping assistant built with Agentic Commerce Protocol (ACP) principles.
+class OrdersIndex:
+    """Maps order IDs to the byte offset of their line in the orders log.
+
+    The log is streamed once to build the index and after that only the
+    bytes appended since the last scan are read, so looking up an order
+    reads a single line instead of parsing the whole history. Methods do
+    blocking file I/O; call them off the event loop.
+    """
+
+    def __init__(self, path: Path = _ORDERS_PATH) -> None:
+        self._path = path
+        self._offsets = {}
+        # How far into the log has been indexed
+        self._scanned = 0
+        # Tool calls run the index in worker threads
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Index orders appended since the last scan, including ones written by other workers."""
+        with self._lock:
+            try:
+                with open(self._path, 'rb') as f:
+                    f.seek(self._scanned)
+                    offset = self._scanned
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            # Another worker is mid-append; pick the line up on the next scan
+                            break
+                        try:
+                            self._offsets[json.loads(line)["id"]] = offset
+                        except (ValueError, KeyError, TypeError):
+                            logger.warning("Skipping malformed order at byte %s of %s", offset, self._path)
+                        offset += len(line)
+            except FileNotFoundError:
+                return
+            self._scanned = offset
+
+    def add(self, order_id: str, offset: int) -> None:
+        with self._lock:
+            self._offsets[order_id] = offset
+
+    def get(self, order_id: str) -> Optional[dict]:
+        """Return the stored order, or None if there's no order with that ID."""
+        offset = self._offsets.get(order_id)
+        if offset is None:
+            # It may have been placed by a session in another worker
+            self.refresh()
+            offset = self._offsets.get(order_id)
+            if offset is None:
+                return None
+        with open(self._path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+
+# Sent as the prefix of every Gemini request. Keep it free of per-session data
+# so Gemini's implicit prefix caching can reuse it across turns and sessions.
+_ECOMMERCE_INSTRUCTIONS = """You are a friendly and helpful e-commerce voice shopping assistant built with Agentic Commerce Protocol (ACP) principles.
 
 YOUR ROLE:
 - Help customers browse and search the product catalog by voice
@@ -79,11 +176,12 @@ YOUR ROLE:
 - Be conversational, friendly, and professional
 
 YOUR CAPABILITIES:
-You have access to four main functions:
+You have access to five main functions:
 1. search_products() - Search catalog by category, price, or color
 2. add_to_cart() - Add items to shopping cart (does NOT place order yet)
 3. get_cart_summary() - Show what's in the cart with total price
 4. place_order_from_cart() - Finalize and save the order
+5. get_order_status() - Look up a placed order by its order ID
 
 YOUR PROCESS:
 
@@ -123,7 +221,7 @@ YOUR PROCESS:
 7. PLACE THE ORDER:
    - Call: place_order_from_cart(buyer_name="...")
    - Shows: Order ID, number of items, total price, status
-   - Announce: "Your order has been saved to our system!"
+   - Announce: "Your order has been placed!"
 
 8. POST-ORDER:
    - If they want more items: "Would you like to continue shopping?"
@@ -143,8 +241,25 @@ AVAILABLE PRODUCTS:
 - Hoodies: Gray Fleece (₹1499), Black Zip (₹1599)
 - Caps: Black Baseball (₹499), Red Baseball (₹599)
 """
-        )
+
+
+class EcommerceAgent(Agent):
+    """E-commerce voice assistant following ACP-inspired patterns."""
+    
+    def __init__(
+        self,
+        orders_index: Optional[OrdersIndex] = None,
+    ) -> None:
+        super().__init__(instructions=_ECOMMERCE_INSTRUCTIONS)
         self.cart = {}
+        self._orders_index = orders_index if orders_index is not None else OrdersIndex()
+        # Order writes still in flight; the confirmation doesn't wait for them
+        self._pending_persist = set()
+        # Normally the snapshot prewarm built; only rebuilt if the catalog file has changed since
+        snapshot = load_catalog_snapshot()
+        self._catalog = snapshot.products
+        self._catalog_by_id = snapshot.by_id
+        self._search_rows = snapshot.search_rows
     
     @function_tool
     async def search_products_tool(self, category: Optional[str] = None, price: Optional[int] = None, color: Optional[str] = None) -> str:
@@ -162,43 +277,48 @@ AVAILABLE PRODUCTS:
         Returns:
             A formatted list of matching products with names, descriptions, prices, colors, and sizes
         """
-        catalog = load_catalog()
-        logger.info(f"[SEARCH] Loaded {len(catalog)} products")
+        catalog = self._catalog
+        logger.info("[SEARCH] Loaded %s products", len(catalog))
         
         if not catalog:
             return "ERROR: Could not load catalog. No products available."
         
-        filtered = catalog
-        
+        search_category = None
         if category:
             search_category = category.lower().replace("-", "").replace(" ", "")
-            logger.info(f"[SEARCH] Looking for category: '{category}' (normalized: '{search_category}')")
-            logger.info(f"[SEARCH] Catalog categories: {[p['category'] for p in catalog]}")
-            filtered = [p for p in filtered if search_category in p["category"].lower().replace("-", "").replace(" ", "")]
-            logger.info(f"[SEARCH] Found {len(filtered)} products for category '{category}'")
-        
-        if price and price > 0:
-            filtered = [p for p in filtered if p["price"] <= price]
-            logger.info(f"[SEARCH] Filtered to {len(filtered)} products with max price {price}")
-        
-        if color:
-            filtered = [p for p in filtered if p["color"].lower() == color.lower()]
-            logger.info(f"[SEARCH] Filtered to {len(filtered)} products with color '{color}'")
+            logger.info("[SEARCH] Looking for category: '%s' (normalized: '%s')", category, search_category)
+            # Building the category list costs a pass over the catalog, so only do it when it'll be printed
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[SEARCH] Catalog categories: %s", [p['category'] for p in catalog])
+        max_price = price if price and price > 0 else None
+        search_color = color.lower() if color else None
+        
+        # Apply all filters in a single pass over the pre-normalized fields
+        filtered = [
+            product
+            for product, norm_category, norm_color, product_price in self._search_rows
+            if (search_category is None or search_category in norm_category)
+            and (max_price is None or product_price <= max_price)
+            and (search_color is None or norm_color == search_color)
+        ]
+        logger.info("[SEARCH] Found %s products for category '%s', max price %s, color '%s'", len(filtered), category, price, color)
         
         if not filtered:
             return "No products found matching your criteria. Please try different filters."
         
-        result = f"Found {len(filtered)} product(s):\n\n"
+        parts = [f"Found {len(filtered)} product(s):\n\n"]
         for idx, product in enumerate(filtered, 1):
-            result += f"{idx}. {product['name']}\n"
-            result += f"   Description: {product['description']}\n"
-            result += f"   Price: ₹{product['price']} {product['currency']}\n"
-            result += f"   Category: {product['category']}\n"
-            result += f"   Color: {product['color']}\n"
-            result += f"   Size: {product['size']}\n\n"
-        
-        logger.info(f"[SEARCH] Returning {len(filtered)} products")
-        return result
+            parts.append(
+                f"{idx}. {product['name']}\n"
+                f"   Description: {product['description']}\n"
+                f"   Price: ₹{product['price']} {product['currency']}\n"
+                f"   Category: {product['category']}\n"
+                f"   Color: {product['color']}\n"
+                f"   Size: {product['size']}\n\n"
+            )
+        
+        logger.info("[SEARCH] Returning %s products", len(filtered))
+        return "".join(parts)
     
     @function_tool
     async def add_to_cart_tool(
@@ -219,13 +339,12 @@ AVAILABLE PRODUCTS:
         Returns:
             Confirmation message with item name, quantity, and price
         """
-        catalog = load_catalog()
-        logger.info(f"[CART] Adding {quantity} of product_id: {product_id}")
+        logger.info("[CART] Adding %s of product_id: %s", quantity, product_id)
         
-        product = next((p for p in catalog if p["id"] == product_id), None)
+        product = self._catalog_by_id.get(product_id)
         
         if not product:
-            logger.warning(f"[CART] Product not found: {product_id}")
+            logger.warning("[CART] Product not found: %s", product_id)
             return f"Product with ID '{product_id}' not found."
         
         if quantity < 1:
@@ -242,7 +361,7 @@ AVAILABLE PRODUCTS:
             }
         
         total_price = self.cart[product_id]['quantity'] * self.cart[product_id]['price']
-        logger.info(f"[CART] Added to cart. New total for item: ₹{total_price}")
+        logger.info("[CART] Added to cart. New total for item: ₹%s", total_price)
         return f"Great! I've added {quantity} {product['name']} to your cart at ₹{product['price']} each."
     
     @function_tool
@@ -259,17 +378,17 @@ AVAILABLE PRODUCTS:
         if not self.cart:
             return "Your cart is empty. Start shopping!"
         
-        summary = "📋 Your Cart:\n\n"
+        parts = ["📋 Your Cart:\n\n"]
         grand_total = 0
         
-        for idx, (product_id, item) in enumerate(self.cart.items(), 1):
+        for idx, item in enumerate(self.cart.values(), 1):
             item_total = item['quantity'] * item['price']
             grand_total += item_total
-            summary += f"{idx}. {item['name']} (x{item['quantity']}) @ ₹{item['price']} each = ₹{item_total}\n"
+            parts.append(f"{idx}. {item['name']} (x{item['quantity']}) @ ₹{item['price']} each = ₹{item_total}\n")
         
-        summary += f"\n💰 Grand Total: ₹{grand_total}\n"
-        logger.info(f"[CART] Showing cart with {len(self.cart)} items, total: ₹{grand_total}")
-        return summary
+        parts.append(f"\n💰 Grand Total: ₹{grand_total}\n")
+        logger.info("[CART] Showing cart with %s items, total: ₹%s", len(self.cart), grand_total)
+        return "".join(parts)
     
     @function_tool
     async def place_order_tool(
@@ -279,7 +398,7 @@ AVAILABLE PRODUCTS:
         """Finalize and place the order from your shopping cart.
         
         This function takes everything in your cart and creates a final order.
-        The order is saved permanently to our system with your name, all items,
+        The order is recorded in our system with your name, all items,
         total price, and timestamp. Your cart is then cleared.
         
         Args:
@@ -291,7 +410,7 @@ AVAILABLE PRODUCTS:
         if not self.cart:
             return "Your cart is empty. Please add items before placing an order."
         
-        logger.info(f"[ORDER] Placing order for {buyer_name} with {len(self.cart)} items")
+        logger.info("[ORDER] Placing order for %s with %s items", buyer_name, len(self.cart))
         
         items = []
         grand_total = 0
@@ -318,9 +437,10 @@ AVAILABLE PRODUCTS:
             "status": "CONFIRMED",
         }
         
-        orders = load_orders()
-        orders.append(order)
-        save_orders(orders)
+        # Persist in the background so the confirmation is spoken without waiting on disk
+        task = asyncio.create_task(self._persist_order(order))
+        self._pending_persist.add(task)
+        task.add_done_callback(self._pending_persist.discard)
         
         confirmation = (
             f"✓ Order confirmed!\n"
@@ -329,27 +449,80 @@ AVAILABLE PRODUCTS:
             f"Total: ₹{grand_total} INR\n"
             f"Buyer: {buyer_name}\n"
             f"Status: {order['status']}\n"
-            f"Your order has been saved to our system!"
+            f"Your order has been placed!"
         )
         
-        logger.info(f"[ORDER] Order placed: ID={order['id']}, Total=₹{grand_total}")
+        logger.info("[ORDER] Order placed: ID=%s, Total=₹%s", order['id'], grand_total)
         
         # Clear the cart after placing order
         self.cart = {}
         return confirmation
 
+    async def _persist_order(self, order: dict) -> None:
+        # The append runs in a thread so STT/TTS keep streaming
+        offset = await asyncio.to_thread(append_order, order)
+        if offset is None:
+            # The customer has already been given a confirmation, so make the lost order easy to find
+            logger.error("[ORDER] Failed to persist order %s: %s", order["id"], json.dumps(order))
+            return
+        self._orders_index.add(order["id"], offset)
+
+    async def flush_pending_orders(self) -> None:
+        """Wait for orders that are still being written. Called at call end."""
+        if self._pending_persist:
+            await asyncio.gather(*self._pending_persist)
+
+    @function_tool
+    async def get_order_status_tool(self, order_id: str) -> str:
+        """Look up a previously placed order by its ID.
+        
+        Use this when the customer asks about an order they already placed,
+        e.g. "What's the status of order ORD-20251201143000?"
+        
+        Args:
+            order_id: The order ID from the order confirmation (e.g., "ORD-20251201143000")
+        
+        Returns:
+            The order's buyer, item count, total, status and placement time
+        """
+        # An order placed moments ago in this session may not be on disk yet
+        await self.flush_pending_orders()
+        order = await asyncio.to_thread(self._orders_index.get, order_id.strip().upper())
+        if order is None:
+            return f"I couldn't find an order with ID '{order_id}'."
+        
+        logger.info("[ORDER] Looked up order %s", order['id'])
+        return (
+            f"Order ID: {order['id']}\n"
+            f"Buyer: {order['buyer_name']}\n"
+            f"Items: {len(order['items'])} product(s)\n"
+            f"Total: ₹{order['total']} {order['currency']}\n"
+            f"Status: {order['status']}\n"
+            f"Placed at: {order['created_at']}"
+        )
+
 
 
 def prewarm(proc: JobProcess):
     """Warm up resources on worker process startup."""
     proc.userdata["vad"] = silero.VAD.load()
+    # Parse the catalog before the job starts so the call doesn't wait on it
+    load_catalog_snapshot()
+    # Build the orders index from the existing log before the job starts
+    orders_index = OrdersIndex()
+    orders_index.refresh()
+    proc.userdata["orders_index"] = orders_index
 
 
 async def entrypoint(ctx: JobContext):
     """Main entrypoint for the e-commerce agent."""
     logger.info("Starting E-commerce Voice Agent")
     
-    agent = EcommerceAgent()
+    agent = EcommerceAgent(
+        orders_index=ctx.proc.userdata.get("orders_index"),
+    )
+    # Don't let the job exit before the last order has reached disk
+    ctx.add_shutdown_callback(agent.flush_pending_orders)
     
     session = AgentSession(
         stt=deepgram.STT(model="nova-3"),
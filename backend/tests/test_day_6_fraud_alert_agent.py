@@ -0,0 +1,13 @@
+from day_6_fraud_alert_agent import ClauseTokenizer
+
+
+def test_clause_tokenizer_splits_on_clauses() -> None:
+    clauses = ClauseTokenizer().tokenize(
+        "We noticed a charge of ₹1,299 at an online store, and a second one of 3.5 dollars. Was that you?"
+    )
+
+    assert clauses == [
+        "We noticed a charge of ₹1,299 at an online store,",
+        "and a second one of 3.5 dollars.",
+        "Was that you?",
+    ]
@@ -0,0 +1,39 @@
+import pytest
+
+import day_7_food_ordering_agent
+from day_7_food_ordering_agent import FoodOrderingAgent
+
+
+def _item(position: int, name: str, category: str, tags: list) -> dict:
+    return {"id": f"item-{position}", "name": name, "price": 100, "category": category, "tags": tags}
+
+
+@pytest.fixture
+def catalog(monkeypatch: pytest.MonkeyPatch) -> list:
+    # Twelve one-term "vegan" matches come first in catalog order, so ranking has to
+    # pull the two-term matches ahead of them and the 10-result cap has to cut some.
+    items = [_item(i, f"Vegan Item {i}", "Pantry", ["vegan"]) for i in range(12)]
+    items += [
+        _item(12, "Oat Porridge", "Breakfast", ["vegan"]),
+        _item(13, "Tofu Scramble", "Breakfast", ["vegan"]),
+        _item(14, "Bacon", "Breakfast", []),
+        _item(15, "Sourdough Bread", "Bakery", []),
+    ]
+    search_index = [
+        ("\n".join([item["name"].lower(), item["category"].lower(), *item["tags"]]), item)
+        for item in items
+    ]
+    monkeypatch.setattr(day_7_food_ordering_agent, "_load_catalog", lambda: {"search_index": search_index})
+    return items
+
+
+async def test_search_ranks_multi_term_matches_first(catalog: list) -> None:
+    result = await FoodOrderingAgent().search_catalog(query="vegan breakfast")
+    header, *lines = result.split("\n")
+
+    # Every match is counted, but only the top 10 are read out
+    assert header == "I found 15 items for you:"
+    assert len(lines) == 10
+    # Items matching both words come first, then ties in catalog order
+    assert lines[:2] == ["- Oat Porridge: ₹100 (Breakfast)", "- Tofu Scramble: ₹100 (Breakfast)"]
+    assert lines[2:] == [f"- Vegan Item {i}: ₹100 (Pantry)" for i in range(8)]
@@ -0,0 +1,26 @@
+from day_8_game_master_agent import GameMasterAgent, Quest, WorldUpdate
+
+
+async def test_update_world_state_bulk_applies_each_update() -> None:
+    agent = GameMasterAgent()
+
+    result = await agent.update_world_state_bulk(
+        updates=[
+            WorldUpdate(field="characters", key="Thorne", value="A scarred innkeeper"),
+            WorldUpdate(field="events", key="", value="Player met Thorne"),
+            WorldUpdate(field="weather", key="Storm", value="Rolling in from the sea"),
+            WorldUpdate(field="quests", key="The Lost Artifact", value="Active"),
+        ]
+    )
+
+    # One line per update, in order, with the invalid field reported rather than applied
+    assert result.split("\n") == [
+        "Added character 'Thorne' to the world.",
+        "Event recorded: Player met Thorne",
+        "Skipped 'Storm': invalid field 'weather'.",
+        "Quest added: 'The Lost Artifact' - Active",
+    ]
+    assert agent.world.npcs == {"Thorne": "A scarred innkeeper"}
+    assert agent.world.events_recorded == 1
+    assert [event.event for event in agent.world.events] == ["Player met Thorne"]
+    assert agent.world.quests == [Quest(quest="The Lost Artifact", status="Active")]
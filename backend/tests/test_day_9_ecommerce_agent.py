@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pytest
+
+import day_9_ecommerce_agent
+from day_9_ecommerce_agent import OrdersIndex, append_order
+
+
+@pytest.fixture
+def orders_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / "day_9_orders" / "orders.jsonl"
+    monkeypatch.setattr(day_9_ecommerce_agent, "_ORDERS_PATH", path)
+    return path
+
+
+def test_append_order_returns_offset_of_its_line(orders_path: Path) -> None:
+    first = append_order({"id": "ORD-1", "total": 800})
+    second = append_order({"id": "ORD-2", "total": 1599})
+
+    data = orders_path.read_bytes()
+    assert first == 0
+    assert second == data.index(b'{"id":"ORD-2"')
+    assert data[second:].endswith(b"\n")
+
+
+def test_orders_index_seeks_to_the_requested_order(orders_path: Path) -> None:
+    append_order({"id": "ORD-1", "buyer_name": "Asha"})
+    append_order({"id": "ORD-2", "buyer_name": "Ravi"})
+
+    index = OrdersIndex(orders_path)
+    index.refresh()
+
+    assert index.get("ORD-2") == {"id": "ORD-2", "buyer_name": "Ravi"}
+    assert index.get("ORD-1") == {"id": "ORD-1", "buyer_name": "Asha"}
+    assert index.get("ORD-404") is None
+
+
+def test_orders_index_refresh_only_reads_complete_new_lines(orders_path: Path) -> None:
+    append_order({"id": "ORD-1"})
+    index = OrdersIndex(orders_path)
+    index.refresh()
+
+    # Another worker has written part of its order but not the newline yet
+    with open(orders_path, "ab") as f:
+        f.write(b'{"id":"ORD-2"')
+    index.refresh()
+    assert "ORD-2" not in index._offsets
+    scanned = index._scanned
+
+    with open(orders_path, "ab") as f:
+        f.write(b"}\n")
+    # Rewrite the already-indexed first line; a rescan from the start would index this ID
+    data = orders_path.read_bytes()
+    orders_path.write_bytes(data.replace(b'"ORD-1"', b'"ORD-X"', 1))
+    index.refresh()
+
+    assert index._offsets == {"ORD-1": 0, "ORD-2": scanned}
+    assert index.get("ORD-2") == {"id": "ORD-2"}